@@ -1,19 +1,26 @@
+import os
+import pickle
 import time
-from functools import lru_cache, wraps
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial, wraps
 
-from operator import itemgetter
 from os import path
 from glob import glob
 import logging
 
 import simplejson as json
+try:
+    import orjson
+except ImportError:  # orjson is an optional, faster parser
+    orjson = None
 import numpy as np
 import pandas as pd
-from sklearn.neighbors import KDTree
 
-import shapely.speedups
+import shapely
 from shapely.geometry import Point, shape as Shape, Polygon
 
+from Orange.misc.environ import cache_dir
+
 from orangecontrib.geo.cc_cities import \
     CC_NAME_TO_CC_NAME, REGION_NAME_TO_REGION_NAME, US_STATE_TO_US_STATE,\
     EUROPE_CITIES, US_CITIES, WORLD_CITIES,\
@@ -23,35 +30,12 @@ from orangecontrib.geo.utils import once
 log = logging.getLogger(__name__)
 
 
-def is_shapely_speedups_available():
-    if not shapely.speedups.available:
-        return False
-    # Otherwise try shapely with speedups in a subprocess to see if shit
-    # is crash due to ABI-incompatible libgeos found in path on Loonix
-    import sys, subprocess
-    proc = subprocess.Popen(
-        sys.executable + ' -c ' + '''"import json
-from shapely.geometry import shape
-import shapely.speedups
-shapely.speedups.enable()
-shape(json.load(open('%s'))['features'][0]['geometry'])
-"''' % path.join(GEOJSON_DIR, 'admin0.json'),
-        # Didn't return correct exit status without shell=True
-        shell=True)
-    proc.wait()
-    return proc.returncode == 0
-
-
 GEOJSON_DIR = path.join(path.dirname(__file__), 'geojson')
 
 ADMIN2_COUNTRIES = {path.basename(filename).split('.')[0].split('-')[1]
                     for filename in glob(path.join(GEOJSON_DIR, 'admin2-*.json'))}
 NUL = {}  # nonmapped (invalid) output region
-
-
-if is_shapely_speedups_available():
-    shapely.speedups.enable()
-    log.debug('Shapely speed-ups available')
+PARALLEL_CHUNK_SIZE = 10000  # minimal number of points per thread
 
 
 def wait_until_loaded(func):
@@ -62,16 +46,94 @@ def wait_until_loaded(func):
     return wrapper
 
 
+def _admin_cc(filename):
+    parts = path.basename(filename).split('.', 1)[0].split('-')
+    admin, cc = parts if len(parts) == 2 else (parts[0], None)
+    admin = int(admin[-1])
+    return admin, cc
+
+
+def _load_file(filename):
+    """
+    Parse a GeoJSON file into admin level, country code, WKB of shapes
+    and their properties. Shapes are returned as WKB, so that the result can
+    be cheaply cached to disk.
+    """
+    admin, cc = _admin_cc(filename)
+
+    if orjson is not None:
+        with open(filename, 'rb') as f:
+            collection = orjson.loads(f.read())
+    else:
+        with open(filename, encoding='utf-8') as f:
+            collection = json.load(f, encoding='utf-8')
+
+    shapes, props = [], []
+    for feature in collection['features']:
+        p = feature['properties']
+        shape = Shape(feature['geometry'])
+
+        # Add representative lat-lon pair if non-existent
+        if (np.isnan(p.get('latitude', np.nan)) or
+            np.isnan(p.get('longitude', np.nan))):
+            try:
+                r = shape.representative_point()
+            except ValueError:
+                # For GBR, representative point above fails with:
+                #   ValueError: No Shapely geometry can be created from null value
+                r = shape.centroid
+                if not r.within(shape):
+                    max_poly = max([shape] if isinstance(shape, Polygon) else shape.geoms,
+                                   key=lambda polygon: polygon.area)
+                    # From https://stackoverflow.com/questions/33311616/find-coordinate-of-closest-point-on-polygon-shapely/33324058#33324058
+                    poly_ext = max_poly.exterior
+                    dist = poly_ext.project(r)
+                    pt = poly_ext.interpolate(dist)
+                    r = Point(pt.coords[0])
+            assert r.within(shape)
+            p.update({"latitude": r.y, "longitude": r.x})
+
+        shapes.append(shape)
+        props.append(p)
+    return admin, cc, shapely.to_wkb(shapes), props
+
+
+def _load_files(files):
+    """
+    Return parsed GeoJSON files (see `_load_file`).
+
+    Parsed files are cached to disk and reused while the names and
+    modification times of GeoJSON files remain the same.
+    """
+    key = sorted((path.basename(filename), path.getmtime(filename))
+                 for filename in files)
+    cache_file = path.join(cache_dir(), 'geo', 'regions-v1.pickle')
+    try:
+        with open(cache_file, 'rb') as f:
+            cached_key, loaded = pickle.load(f)
+        if cached_key == key:
+            log.debug('Loading GeoJSON data from cache ...')
+            return loaded
+    except Exception:  # pylint: disable=broad-except
+        pass
+
+    log.debug('Loading GeoJSON data ...')
+    loaded = list(map(_load_file, files))
+
+    try:
+        os.makedirs(path.dirname(cache_file), exist_ok=True)
+        with open(cache_file, 'wb') as f:
+            pickle.dump((key, loaded), f, protocol=pickle.HIGHEST_PROTOCOL)
+    except OSError:
+        log.warning('Cannot write GeoJSON cache to %s', cache_file)
+    return loaded
+
+
 @once
 def __load():
-    def _admin_cc(filename):
-        parts = path.basename(filename).split('.', 1)[0].split('-')
-        admin, cc = parts if len(parts) == 2 else (parts[0], None)
-        admin = int(admin[-1])
-        return admin, cc
-
-    nearest_points = {0: [], 1: [], 2: []}
-    shapes = {0: [], 1: [], 2: []}
+    # Geometries and their properties are kept in parallel lists per admin
+    geoms = {0: [], 1: [], 2: []}
+    props = {0: [], 1: [], 2: []}
     cc_shapes = {}
     id_regions = {}
     us_states = {}
@@ -83,50 +145,12 @@ def __load():
             'In development environments, merge in the "json"'
             'branch. See CONTRIBUTING.md')
 
-    log.debug('Loading GeoJSON data ...')
-    for filename in files:
-        admin, cc = _admin_cc(filename)
-
-        with open(filename, encoding='utf-8') as f:
-            collection = json.load(f, encoding='utf-8')
-
-        for feature in collection['features']:
-            p = feature['properties']
-            shape = Shape(feature['geometry'])
+    for admin, cc, wkbs, file_props in _load_files(files):
+        for shape, p in zip(shapely.from_wkb(wkbs), file_props):
             tup = (shape, p)
 
-            # Add representative lat-lon pair if non-existent
-            if (np.isnan(p.get('latitude', np.nan)) or
-                np.isnan(p.get('longitude', np.nan))):
-                try:
-                    r = shape.representative_point()
-                except ValueError:
-                    # For GBR, representative point above fails with:
-                    #   ValueError: No Shapely geometry can be created from null value
-                    r = shape.centroid
-                    if not r.within(shape):
-                        max_poly = max([shape] if isinstance(shape, Polygon) else list(shape),
-                                       key=lambda polygon: polygon.area)
-                        # From https://stackoverflow.com/questions/33311616/find-coordinate-of-closest-point-on-polygon-shapely/33324058#33324058
-                        poly_ext = max_poly.exterior
-                        dist = poly_ext.project(r)
-                        pt = poly_ext.interpolate(dist)
-                        r = Point(pt.coords[0])
-                assert r.within(shape)
-                p.update({"latitude": r.y, "longitude": r.x})
-
-            # Get representative points for the k-d tree
-            points = []
-            polygons = (shape,) if isinstance(shape, Polygon) else shape.geoms
-            for poly in polygons:
-                points.append([poly.centroid.y, poly.centroid.x])
-                if poly.area > 10:
-                    points.extend(xy[::-1]
-                                  for xy in poly.simplify(1).exterior.coords)
-
-            nearest_points[admin].extend(points)
-            tups = [tup] * len(points)
-            shapes[admin].extend(tups)
+            geoms[admin].append(shape)
+            props[admin].append(p)
             id_regions[p['_id']] = tup
 
             if admin == 0:
@@ -135,21 +159,49 @@ def __load():
             # Make Admin1 shapes available in Admin2 too. Except for USA
             # which is the country we have explicit Admin2 shapes for
             if admin == 1 and cc not in ADMIN2_COUNTRIES:
-                shapes[2].extend(tups)
-                nearest_points[2].extend(points)
+                geoms[2].append(shape)
+                props[2].append(p)
 
             if admin == 1 and cc == 'USA':
                 us_states[p['hasc'].split('.')[1]] = tup
 
-    kdtree = {admin: KDTree(np.array(centroids))
-              for admin, centroids in nearest_points.items()}
     cc_shapes['NUL'] = (None, NUL)  # tuple for Null Island
 
-    assert all(len(nearest_points[admin]) == len(shapes[admin])
-               for admin in shapes)
-
-    global SHAPES, CC_SHAPES, KDTREE, ID_REGIONS, US_STATES
-    SHAPES, CC_SHAPES, KDTREE, ID_REGIONS, US_STATES = shapes, cc_shapes, kdtree, id_regions, us_states
+    # Geometries as object arrays for vectorized shapely calls; prepared once
+    # here so that point-in-polygon tests use GEOS' prepared geometry index
+    geoms = {admin: np.array(admin_geoms, dtype=object)
+             for admin, admin_geoms in geoms.items()}
+    for admin_geoms in geoms.values():
+        shapely.prepare(admin_geoms)
+    strtree = {admin: shapely.STRtree(admin_geoms)
+               for admin, admin_geoms in geoms.items()}
+
+    # Representative (lon, lat) of regions, in order of id_regions
+    id_rows = {_id: i for i, _id in enumerate(id_regions)}
+    id_coords = np.array([(p['longitude'], p['latitude'])
+                          for _, p in id_regions.values()])
+
+    global GEOMS, PROPS, CC_SHAPES, STRTREE, ID_REGIONS, US_STATES
+    GEOMS, PROPS, CC_SHAPES, STRTREE, ID_REGIONS, US_STATES = \
+        geoms, props, cc_shapes, strtree, id_regions, us_states
+    global ID_ROWS, ID_COORDS, COUNTRY_PROPS
+    ID_ROWS, ID_COORDS = id_rows, id_coords
+    # Countries are found through Admin1 shapes; properties of their
+    # countries, aligned with PROPS[1]
+    COUNTRY_PROPS = [cc_shapes[p['adm0_a3']][1] for p in props[1]]
+
+    # Series that map identifiers to region properties, see ToLatLon._get
+    global LOOKUPS
+    LOOKUPS = {
+        'cc_name': ToLatLon._lookup_series(cc_shapes, 'name'),
+        'cc2': ToLatLon._lookup_series(cc_shapes, 'iso_a2'),
+        'cc3': ToLatLon._lookup_series(cc_shapes, 'iso_a3'),
+        'region': ToLatLon._lookup_series(id_regions, 'name'),
+        'fips': ToLatLon._lookup_series(id_regions, 'fips'),
+        'hasc': ToLatLon._lookup_series(id_regions, 'hasc'),
+        'us_state': ToLatLon._lookup_series(us_states, 'name',
+                                            with_keys=True),
+    }
 
 
 class ToLatLon:
@@ -159,72 +211,99 @@ class ToLatLon:
                 for _, p in mapping.values()
                 if key in p}
 
+    @classmethod
+    def _lookup_series(cls, mapping, key, with_keys=False):
+        """
+        Return a series that maps values of property `key` to region
+        properties in `mapping`; if `with_keys` is set, its keys are mapped,
+        too.
+        """
+        lookup = cls._lookup(mapping, key)
+        if with_keys:
+            lookup.update({k: data for k, (_polygon, data) in mapping.items()})
+        # Pandas would match a None key with missing values
+        lookup.pop(None, None)
+        return pd.Series(lookup, dtype=object)
+
     @classmethod
     def _get(cls, lookup, values, to_replace={}, _NUL={}):
-        mapping = values.drop_duplicates()
+        # missing values (None and nan would be duplicates in the index)
+        # are left out and map to _NUL below
+        mapping = values.dropna().drop_duplicates()
         mapping.index = mapping.values.copy()
         mapping.replace(to_replace, inplace=True, regex=True)
-        mapping = mapping.apply(lookup.get, args=(_NUL,))
-        return values.map(mapping).tolist()
+        mapping = mapping.map(lookup)
+        # Series.map gives nan for unmatched (and missing) values
+        return [m if isinstance(m, dict) else _NUL
+                for m in values.map(mapping)]
 
     @classmethod
     @wait_until_loaded
     def from_cc_name(cls, values):
-        return cls._get(ToLatLon._lookup(CC_SHAPES, 'name'), values, CC_NAME_TO_CC_NAME)
+        return cls._get(LOOKUPS['cc_name'], values, CC_NAME_TO_CC_NAME)
 
     @classmethod
     @wait_until_loaded
     def from_cc2(cls, values):
-        return cls._get(ToLatLon._lookup(CC_SHAPES, 'iso_a2'), values)
+        return cls._get(LOOKUPS['cc2'], values)
 
     @classmethod
     @wait_until_loaded
     def from_cc3(cls, values):
-        return cls._get(ToLatLon._lookup(CC_SHAPES, 'iso_a3'), values)
+        return cls._get(LOOKUPS['cc3'], values)
 
     @classmethod
     @wait_until_loaded
     def from_region(cls, values):
-        return cls._get(ToLatLon._lookup(ID_REGIONS, 'name'), values, REGION_NAME_TO_REGION_NAME)
+        return cls._get(LOOKUPS['region'], values, REGION_NAME_TO_REGION_NAME)
 
     @classmethod
     @wait_until_loaded
     def from_fips(cls, values):
-        return cls._get(ToLatLon._lookup(ID_REGIONS, 'fips'), values)
+        return cls._get(LOOKUPS['fips'], values)
 
     @classmethod
     @wait_until_loaded
     def from_hasc(cls, values):
-        return cls._get(ToLatLon._lookup(ID_REGIONS, 'hasc'), values)
+        return cls._get(LOOKUPS['hasc'], values)
 
     @classmethod
     @wait_until_loaded
     def from_us_state(cls, values):
-        lookup = ToLatLon._lookup(US_STATES, 'name')
-        lookup.update({short_name: data
-                       for short_name, (_polygon, data) in US_STATES.items()})
-        return cls._get(lookup, values, US_STATE_TO_US_STATE)
+        return cls._get(LOOKUPS['us_state'], values, US_STATE_TO_US_STATE)
+
+    @staticmethod
+    def _replace_unique(values, regex):
+        """
+        Apply regex replacements to distinct values only (cities repeat a
+        lot) and map the results back to all values
+        """
+        # missing values are left out and stay missing
+        uniques = values.dropna().drop_duplicates()
+        replaced = pd.Series(uniques.replace(regex=regex).values,
+                             index=uniques.values)
+        return values.map(replaced)
 
     @classmethod
     @wait_until_loaded
     def from_city_eu(cls, values):
         assert isinstance(values, pd.Series)
-        return cls.from_cc2(values.replace(regex=EUROPE_CITIES))
+        return cls.from_cc2(cls._replace_unique(values, EUROPE_CITIES))
 
     @classmethod
     @wait_until_loaded
     def from_city_us(cls, values):
         assert isinstance(values, pd.Series)
-        return cls.from_us_state(values.replace(regex=US_CITIES))
+        return cls.from_us_state(cls._replace_unique(values, US_CITIES))
 
     @classmethod
     @wait_until_loaded
     def from_city_world(cls, values):
         assert isinstance(values, pd.Series)
-        return cls.from_cc2(values.replace(regex=WORLD_CITIES))
+        return cls.from_cc2(cls._replace_unique(values, WORLD_CITIES))
 
     @classmethod
-    @lru_cache(1)
+    @lru_cache(None)
     @wait_until_loaded
     def valid_values(cls, method):
         """ Return a sorted list of valid values for method of ToLatLon """
@@ -274,63 +353,92 @@ class ToLatLon:
         return None
 
 
+def _find_regions(tree, geoms, lat, lon):
+    """
+    Return indices of regions (in `geoms`) that contain the given points,
+    or -1 for points that are not in (or near) any region
+    """
+    points = shapely.points(lon, lat)
+
+    # Candidates are shapes whose bounding boxes contain the point; test the
+    # (point, shape) pairs with a single vectorized contains call
+    point_inds, shape_inds = tree.query(points)
+    hits = shapely.contains_xy(geoms[shape_inds],
+                               lon[point_inds], lat[point_inds])
+    point_inds, shape_inds = point_inds[hits], shape_inds[hits]
+
+    # Pairs are sorted by point; the first containing shape wins
+    found = np.full(len(points), -1)
+    rows, first = np.unique(point_inds, return_index=True)
+    found[rows] = shape_inds[first]
+
+    # No shapes contain these points. See if distance to nearest shape
+    # is less than threshold (i.e. point very near but outside shape)
+    miss_rows = np.flatnonzero(found == -1)
+    if len(miss_rows):
+        near_inds, shape_inds = tree.query_nearest(
+            points[miss_rows], max_distance=.2, all_matches=False)
+        found[miss_rows[near_inds]] = shape_inds
+    return found
+
+
 @wait_until_loaded
 def latlon2region(latlon, admin=0):
     """Return list of property dicts for regions mapped by latlon coordinates"""
     assert len(latlon) == 0 or len(latlon[0]) == 2
     assert 0 <= admin <= 2
-    global SHAPES, CC_SHAPES, KDTREE
+    global GEOMS, PROPS, COUNTRY_PROPS, STRTREE
 
-    latlon = np.asanyarray(latlon, dtype=float)
+    latlon = np.asanyarray(latlon, dtype=float).reshape(-1, 2)
 
     log.debug('Mapping %d coordinate pairs into regions', len(latlon))
 
-    # Replace missing latlon data with invalid coordinates for k-d tree to work
-    nan_rows = np.isnan(latlon).any(axis=1)
-    if nan_rows.any():
-        latlon = np.array(latlon, order='C', copy=True)
-        latlon[nan_rows, :] = -500
-
-    @lru_cache(700)
-    def resolve_coords(coord):
-        """Cached resolution.
-        shape.contains(point) test is what takes the most time
-        """
-        nonlocal inds, shapes
-        point = Point(*coord)
-        for i in inds:
-            shape, props = shapes[i]
-            if shape.contains(point):
-                return props
-        # No shapes contain point. See if distance to nearest neighbor
-        # is less than threshold (i.e. point very near but outside shape)
-        shape, props = shapes[sorted(inds, key=lambda i: shapes[i][0].distance(point))[0]]
-        return props if shape.distance(point) < .2 else NUL
-
-    out = []
-    shapes = SHAPES[admin or 1]
-    for isnan, coord, inds in zip(nan_rows,
-                                  np.roll(latlon, -1, axis=1),
-                                  KDTREE[admin or 1].query(latlon, k=30,
-                                                           return_distance=False,
-                                                           sort_results=True)):
-        out.append(NUL if isnan else resolve_coords(tuple(coord)))
-
-    if admin == 0:
-        out = [i and CC_SHAPES[i['adm0_a3']][1] for i in out]
+    geoms, tree = GEOMS[admin or 1], STRTREE[admin or 1]
+    props = PROPS[admin] if admin else COUNTRY_PROPS
+    # Points with missing coordinates are left out and map to NUL
+    valid = np.flatnonzero(~np.isnan(latlon).any(axis=1))
+    # Each distinct coordinate pair is resolved only once
+    coords, inverse = np.unique(latlon[valid], axis=0, return_inverse=True)
+    lat, lon = coords.T
+
+    # Vectorized shapely calls release the GIL, so large inputs are split
+    # into chunks that are resolved in parallel threads
+    n_chunks = min(-(-len(coords) // PARALLEL_CHUNK_SIZE), os.cpu_count() or 1)
+    if n_chunks > 1:
+        with ThreadPoolExecutor(n_chunks) as executor:
+            found = np.concatenate(list(executor.map(
+                partial(_find_regions, tree, geoms),
+                np.array_split(lat, n_chunks), np.array_split(lon, n_chunks))))
+    else:
+        found = _find_regions(tree, geoms, lat, lon)
+
+    regions = np.full(len(latlon), -1)
+    regions[valid] = found[inverse.ravel()]
+    out = [props[i] if i != -1 else NUL for i in regions.tolist()]
 
     assert len(out) == len(latlon)
     return out
 
 
+@wait_until_loaded
+def admin1_to_country(regions):
+    """
+    Return list of property dicts for countries of Admin1 regions given by
+    property dicts; equal to `latlon2region(latlon, 0)` for
+    `regions = latlon2region(latlon, 1)`
+    """
+    return [CC_SHAPES[region['adm0_a3']][1] if region else NUL
+            for region in regions]
+
+
 @wait_until_loaded
 def get_bounding_rect(region_ids):
     """Return lat-lon bounding rect of the union of regions defined by ids"""
     if not region_ids:
         return None
-    coords = itemgetter('longitude', 'latitude')
-    centroids = np.array([coords(ID_REGIONS[_id][1])
-                          for _id in region_ids])
+    rows = np.fromiter((ID_ROWS[_id] for _id in region_ids), dtype=int,
+                       count=len(region_ids))
+    centroids = ID_COORDS[rows]
     mins, maxs = centroids.min(0), centroids.max(0)
     return tuple(mins.tolist() + maxs.tolist())
 
@@ -1,10 +1,17 @@
+import tempfile
 import unittest
+from os import path
+from glob import glob
 from unittest import TestCase
+from unittest.mock import patch
 
 import numpy as np
+import pandas as pd
 
-from orangecontrib.geo.mapper import latlon2region, get_bounding_rect
-from orangecontrib.geo.utils import find_lat_lon
+from orangecontrib.geo import mapper
+from orangecontrib.geo.mapper import latlon2region, admin1_to_country, \
+    get_bounding_rect, ToLatLon
+from orangecontrib.geo.utils import find_lat_lon, once
 from Orange.data import Table, Domain, DiscreteVariable, ContinuousVariable
 
 
@@ -40,6 +47,57 @@ class TestUtils(TestCase):
             ['SVN-962', 'USA-NY-36061', 'USA-TX-48113', 'CAN-683', 'CHN-1662',
              'RUS-2603', 'ISL-695', 'CAN-635', None, None])
 
+    def test_mapper_parallel(self):
+        latlons = np.array([
+            [46.0555, 14.5083],
+            [40.7127, -74.0059],
+            [np.nan, 12],
+            [0, -1],
+            [64.295556, -15.227222],
+        ] * 3)
+        expected = latlon2region(latlons, 1)
+        with patch("orangecontrib.geo.mapper.PARALLEL_CHUNK_SIZE", 4), \
+                patch("os.cpu_count", return_value=4):
+            self.assertEqual(latlon2region(latlons, 1), expected)
+
+    def test_admin1_to_country(self):
+        latlons = np.array([
+            [46.0555, 14.5083],
+            [40.7127, -74.0059],
+            [np.nan, 12],
+            [0, -1],
+        ])
+        self.assertEqual(admin1_to_country(latlon2region(latlons, 1)),
+                         latlon2region(latlons, 0))
+
+    def test_to_lat_lon_missing(self):
+        values = pd.Series(["SVN", None, np.nan, "USA"], dtype=object)
+        for method in (ToLatLon.from_cc3, ToLatLon.from_hasc,
+                       ToLatLon.from_cc_name, ToLatLon.from_us_state):
+            regions = method(values)
+            self.assertEqual(regions[1], {})
+            self.assertEqual(regions[2], {})
+        self.assertEqual(
+            [region.get('_id') for region in ToLatLon.from_cc3(values)],
+            ['SVN', None, None, 'USA'])
+        cities = pd.Series(["Berlin", None, np.nan], dtype=object)
+        self.assertEqual(
+            [region.get('_id') for region in ToLatLon.from_city_eu(cities)],
+            ['DEU', None, None])
+
+    def test_load_files_cache(self):
+        files = sorted(glob(path.join(mapper.GEOJSON_DIR, 'admin1-SVN.json')))
+        with tempfile.TemporaryDirectory() as tmp, \
+                patch("orangecontrib.geo.mapper.cache_dir", return_value=tmp):
+            loaded = mapper._load_files(files)
+            with patch("orangecontrib.geo.mapper._load_file") as load_file:
+                cached = mapper._load_files(files)
+                load_file.assert_not_called()
+        (admin, cc, wkbs, props), = loaded
+        self.assertEqual((admin, cc), (1, 'SVN'))
+        np.testing.assert_array_equal(cached[0][2], wkbs)
+        self.assertEqual(cached[0][3], props)
+
     def test_get_bounding_rect(self):
         np.testing.assert_equal(np.array(get_bounding_rect({'SWE', 'ITA'}), dtype=int),
                                 np.r_[12, 42, 14, 62])
@@ -98,6 +156,27 @@ class TestUtils(TestCase):
         self.assertEqual(attrs_for(d1, lon, c1, c2), (lon, lon))
         self.assertEqual(attrs_for(d1, c3, c2, c1), (c3, c3))
 
+    def test_once(self):
+        calls = []
+
+        @once
+        def f():
+            calls.append(1)
+            return 42
+
+        self.assertEqual(f(), 42)
+        self.assertEqual(f(), 42)
+        self.assertEqual(len(calls), 1)
+
+        @once
+        def g():
+            calls.append(2)
+            raise ValueError
+
+        self.assertRaises(ValueError, g)
+        self.assertRaises(ValueError, g)
+        self.assertEqual(calls.count(2), 1)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -53,10 +53,15 @@ def find_lat_lon(data, filter_hidden=False):
     if lat_attr and lon_attr:
         return lat_attr, lon_attr
 
+    maxima = {}
+
     def max_in_col(attr):
         if not data:
             return 0
-        return np.nanmax(np.abs(data.get_column(attr).astype(float)))
+        if attr not in maxima:
+            col = data.get_column(attr).astype(float, copy=False)
+            maxima[attr] = max(-np.nanmin(col), np.nanmax(col))
+        return maxima[attr]
 
     if len(cont_vars) == 2:
         if lat_attr is not None:
@@ -94,7 +99,7 @@ def once(func: Callable[[], T]) -> Callable[[], T]:
         else:
             with state.lock:
                 if state.result is not None:
-                    return state.result.result
+                    return state.result.result()
                 else:
                     f = state.result = Future()
                     f.set_running_or_notify_cancel()
@@ -3,23 +3,22 @@ import itertools
 from xml.sax.saxutils import escape
 from typing import List, NamedTuple, Optional, Union, Callable, Tuple
 from math import floor, log10
-from functools import reduce
 
 from AnyQt.QtCore import Qt, QObject, QSize, QRectF, pyqtSignal as Signal, \
     QPointF
-from AnyQt.QtGui import QPen, QBrush, QColor, QPolygonF, QPainter, QStaticText, QPalette
+from AnyQt.QtGui import QPen, QBrush, QColor, QPolygonF, QPainter, \
+    QPainterPath, QStaticText, QPalette
 from AnyQt.QtWidgets import QApplication, QToolTip, QGraphicsTextItem, \
     QGraphicsRectItem
 
-from shapely.geometry import Polygon, MultiPolygon
-from shapely.ops import transform
+import shapely
 import pyqtgraph as pg
 from pyqtgraph.graphicsItems.LegendItem import ItemSample
 import numpy as np
 import pandas as pd
 from scipy import stats
 
-from Orange.data import Table, Domain, ContinuousVariable, DiscreteVariable, \
+from Orange.data import Table, ContinuousVariable, DiscreteVariable, \
     TimeVariable
 from Orange.data.util import array_equal
 from Orange.data.sql.table import SqlTable
@@ -45,7 +44,8 @@ from Orange.widgets.settings import Setting, SettingProvider, rename_setting, \
     DomainContextHandler, ContextSetting, migrate_str_to_variable
 
 from orangecontrib.geo.utils import find_lat_lon
-from orangecontrib.geo.mapper import latlon2region, get_shape
+from orangecontrib.geo.mapper import latlon2region, admin1_to_country, \
+    get_shape
 from orangecontrib.geo.widgets.plotutils import MapMixin, MapViewBox, \
     _TileProvider, deg2norm
 
@@ -96,6 +96,7 @@ class BinningPaletteItemSample(ItemSample):
         for label in self.labels:
             label.prepare(font=font)
         self.text_width = max(label.size().width() for label in self.labels)
+        self.brushes = [QBrush(color) for color in self.palette.qcolors]
 
     def boundingRect(self):
         return QRectF(0, 0, 40 + self.text_width, 20 + self.binning.nbins * 15)
@@ -106,12 +107,13 @@ class BinningPaletteItemSample(ItemSample):
         font = p.font()
         font.setPixelSize(11)
         p.setFont(font)
-        colors = self.palette.qcolors
-        for i, color, label in zip(itertools.count(), colors, self.labels):
+        black_pen = QPen(Qt.black)
+        for i, brush, label in zip(itertools.count(), self.brushes,
+                                   self.labels):
             p.setPen(Qt.NoPen)
-            p.setBrush(QBrush(color))
+            p.setBrush(brush)
             p.drawRect(0, i * 15, 15, 15)
-            p.setPen(QPen(Qt.black))
+            p.setPen(black_pen)
             p.drawStaticText(20, i * 15 + 1, label)
 
 
@@ -128,22 +130,24 @@ class ChoroplethItem(pg.GraphicsObject):
         self.region = region
         self.agg_value = ""
         self.agg_func = ""
+        self.agg_formatter = str
         self.pen = pen
         self.brush = brush
 
-        self._region_info = self._get_region_info(self.region)
-        self._bounding_rect = reduce(
-            lambda br1, br2: br1.united(br2),
-            (qpoly.boundingRect() for qpoly in self.region.qpolys)
-        )
+        # draw all polygons of the region with a single call
+        self._path = QPainterPath()
+        for qpoly in self.region.qpolys:
+            self._path.addPolygon(qpoly)
+        self._bounding_rect = self._path.boundingRect()
 
     @staticmethod
     def _get_region_info(region: _ChoroplethRegion):
         return "<b>Region = </b>" + region.info['name']
 
     def tooltip(self):
-        return f"<b>{self.agg_func} = {self.agg_value}</b><hr/>" \
-               f"{self._region_info}"
+        agg_value = self.agg_formatter(self.agg_value)
+        return f"<b>{self.agg_func} = {agg_value}</b><hr/>" \
+               f"{self._get_region_info(self.region)}"
 
     def setPen(self, pen):
         self.pen = pen
@@ -156,19 +160,16 @@ class ChoroplethItem(pg.GraphicsObject):
     def paint(self, p: QPainter, *args):
         p.setBrush(self.brush)
         p.setPen(self.pen)
-        for qpoly in self.region.qpolys:
-            p.drawPolygon(qpoly)
+        p.drawPath(self._path)
 
     def boundingRect(self) -> QRectF:
         return self._bounding_rect
 
     def contains(self, point: QPointF) -> bool:
-        return any(qpoly.containsPoint(point, Qt.OddEvenFill)
-                   for qpoly in self.region.qpolys)
+        return self._path.contains(point)
 
-    def intersects(self, poly: QPolygonF) -> bool:
-        return any(not qpoly.intersected(poly).isEmpty()
-                   for qpoly in self.region.qpolys)
+    def intersects(self, rect: QRectF) -> bool:
+        return self._path.intersects(rect)
 
     def mouseClickEvent(self, ev):
         if ev.button() == Qt.LeftButton and self.contains(ev.pos()) \
@@ -206,6 +207,8 @@ class OWChoroplethPlotGraph(gui.OWComponent, QObject):
         self._create_drag_tooltip(self.plot_widget.scene())
 
         self.choropleth_items = []  # type: List[ChoroplethItem]
+        # bounding rects of items as rows of (x1, y1, x2, y2)
+        self.item_rects = np.empty((0, 4))
 
         self.id_to_index = {}
         self.selection = None  # np.ndarray
@@ -275,6 +278,7 @@ class OWChoroplethPlotGraph(gui.OWComponent, QObject):
         self.color_legend.clear()
         self.update_legend_visibility()
         self.choropleth_items = []
+        self.item_rects = np.empty((0, 4))
         self.id_to_index = {}
         self.selection = None
 
@@ -290,15 +294,21 @@ class OWChoroplethPlotGraph(gui.OWComponent, QObject):
         pen = self._make_pen(QColor(Qt.white), 1)
         brush = QBrush(Qt.NoBrush)
         regions = self.master.get_choropleth_regions()
+        # items are children of a single group, so the plot registers one
+        # item instead of one per region
+        group = pg.ItemGroup()
         for region in regions:
             choropleth_item = ChoroplethItem(region, pen=pen, brush=brush)
             choropleth_item.itemClicked.connect(self.select_by_id)
-            self.plot_widget.addItem(choropleth_item)
+            choropleth_item.setParentItem(group)
             self.choropleth_items.append(choropleth_item)
+        self.plot_widget.addItem(group)
 
         if self.choropleth_items:
             self.id_to_index = {
                 id_: cnt for cnt, id_ in enumerate(self.master.region_ids)}
+            self.item_rects = np.array([ci.boundingRect().getCoords()
+                                        for ci in self.choropleth_items])
 
     def update_colors(self):
         """Update agg_value and inner color of existing polygons."""
@@ -307,9 +317,13 @@ class OWChoroplethPlotGraph(gui.OWComponent, QObject):
 
         agg_data = self.master.get_agg_data()
         brushes = self.get_colors()
+        agg_func = self.master.agg_func
+        formatter = self.master.format_agg_val
         for ci, d, b in zip(self.choropleth_items, agg_data, brushes):
-            ci.agg_value = self.master.format_agg_val(d)
-            ci.agg_func = self.master.agg_func
+            # values are formatted only when a tooltip is shown
+            ci.agg_value = d
+            ci.agg_func = agg_func
+            ci.agg_formatter = formatter
             ci.setBrush(b)
         self.update_legends()
 
@@ -328,22 +342,24 @@ class OWChoroplethPlotGraph(gui.OWComponent, QObject):
         palette = self.master.get_palette()
         bins = self.master.get_binning().thresholds
         self.palette = BinnedContinuousPalette.from_palette(palette, bins)
-        rgb = self.palette.values_to_colors(c_data)
-        rgba = np.hstack(
-            [rgb, np.full((len(rgb), 1), self.alpha_value, dtype=np.ubyte)])
-
-        return [QBrush(QColor(*col)) for col in rgba]
+        # same binning as in BinnedContinuousPalette.values_to_colors
+        bin_indices = np.digitize(c_data, self.palette.bins[1:-1])
+        bin_indices[np.isnan(c_data)] = -1
+        return self._get_brushes(bin_indices)
 
     def _get_discrete_colors(self, c_data):
         self.palette = self.master.get_palette()
-        c_data = c_data.copy()
-        c_data[np.isnan(c_data)] = len(self.palette)
-        c_data = c_data.astype(int)
+        c_data = np.where(np.isnan(c_data), -1, c_data).astype(int)
+        return self._get_brushes(c_data)
+
+    def _get_brushes(self, indices):
+        # create a brush for each palette color (the last one is for nan),
+        # not for each region
         colors = self.palette.qcolors_w_nan
         for col in colors:
             col.setAlpha(self.alpha_value)
         brushes = np.array([QBrush(col) for col in colors])
-        return brushes[c_data]
+        return brushes[indices]
 
     def update_legends(self):
         color_labels = self.master.get_color_labels()
@@ -392,12 +408,12 @@ class OWChoroplethPlotGraph(gui.OWComponent, QObject):
             sels = np.max(self.selection)
             if sels == 1:
                 orange_pen = self._make_pen(QColor(255, 190, 0, 255), 3)
-                pen = np.where(self.selection, orange_pen, white_pen)
+                pens = [white_pen, orange_pen]
             else:
                 palette = LimitedDiscretePalette(number_of_colors=sels + 1)
                 pens = [white_pen] + [self._make_pen(palette[i], 3)
                                       for i in range(sels)]
-                pen = np.choose(self.selection, pens)
+            pen = np.array(pens, dtype=object)[self.selection]
         return pen
 
     @staticmethod
@@ -467,10 +483,17 @@ class OWChoroplethPlotGraph(gui.OWComponent, QObject):
         """
         Find regions that intersect with selected rectangle.
         """
-        poly_rect = QPolygonF(rect)
+        rect = rect.normalized()
+        # only regions whose bounding rects overlap need the polygon test
+        x1, y1, x2, y2 = rect.getCoords()
+        rects = self.item_rects
+        candidates = np.flatnonzero(
+            (rects[:, 0] <= x2) & (rects[:, 2] >= x1)
+            & (rects[:, 1] <= y2) & (rects[:, 3] >= y1))
         indices = set()
-        for ci in self.choropleth_items:
-            if ci.intersects(poly_rect):
+        for i in candidates:
+            ci = self.choropleth_items[i]
+            if ci.intersects(rect):
                 indices.add(self.id_to_index[ci.region.id])
         if indices:
             self.select_by_indices(np.array(list(indices)))
@@ -517,13 +540,10 @@ class OWChoroplethPlotGraph(gui.OWComponent, QObject):
         self.master.selection_changed()
 
     def _compress_indices(self):
-        indices = sorted(set(self.selection) | {0})
-        if len(indices) == max(indices) + 1:
+        indices = np.union1d(self.selection, [0])
+        if len(indices) == indices[-1] + 1:
             return
-        mapping = np.zeros((max(indices) + 1,), dtype=int)
-        for i, ind in enumerate(indices):
-            mapping[ind] = i
-        self.selection = mapping[self.selection]
+        self.selection = np.searchsorted(indices, self.selection)
 
     def get_selection(self):
         if self.selection is None:
@@ -536,8 +556,13 @@ class OWChoroplethPlotGraph(gui.OWComponent, QObject):
         if not self.choropleth_items:
             return False
         act_pos = self.choropleth_items[0].mapFromScene(event.scenePos())
-        ci = next((ci for ci in self.choropleth_items
-                   if ci.contains(act_pos)), None)
+        x, y, rects = act_pos.x(), act_pos.y(), self.item_rects
+        candidates = np.flatnonzero(
+            (rects[:, 0] <= x) & (rects[:, 2] >= x)
+            & (rects[:, 1] <= y) & (rects[:, 3] >= y))
+        items = self.choropleth_items
+        ci = next((items[i] for i in candidates if items[i].contains(act_pos)),
+                  None)
         if ci is not None:
             QToolTip.showText(event.screenPos(), ci.tooltip(),
                               widget=self.plot_widget)
@@ -561,11 +586,8 @@ class OWChoroplethPlotMapGraph(MapMixin, OWChoroplethPlotGraph):
             min_x, max_x, min_y, max_y = 0, 1, 0, 1
             if self.choropleth_items:
                 # find bounding rect off all ChoroplethItems
-                rect = self.choropleth_items[0].boundingRect()
-                for ci in self.choropleth_items[1:]:
-                    rect = rect.united(ci.boundingRect())
-                min_x, min_y = rect.x(), rect.y()
-                max_x, max_y = rect.x() + rect.width(), rect.y() + rect.height()
+                min_x, min_y = self.item_rects[:, :2].min(axis=0)
+                max_x, max_y = self.item_rects[:, 2:].max(axis=0)
         else:
             [min_x, max_x], [min_y, max_y] = self.view_box.viewRange()
 
@@ -609,6 +631,58 @@ DEFAULT_AGG_FUNCS = {
 
 COUNT_AGGS = list(AGG_FUNCS)[:2]
 DEFAULT_AGG_FUNC = COUNT_AGGS[0]
+BINCOUNT_AGGS = ("size", "count", "sum", "mean", "std", "min", "max")
+
+
+def bincount_agg(codes, n_groups, data, transform):
+    """
+    Aggregate `data` into `n_groups` groups given by `codes` (-1 for rows
+    without a group) for transforms in BINCOUNT_AGGS; equivalent to
+    pandas' groupby, but with single passes of `np.bincount` or `ufunc.at`.
+    `data` is not used for "size" and may be None.
+    """
+    grouped = codes >= 0
+    codes = codes[grouped]
+    if transform == "size":
+        return np.bincount(codes, minlength=n_groups)
+
+    data = data[grouped].astype(float, copy=False)
+    defined = ~np.isnan(data)
+    codes, data = codes[defined], data[defined]
+    if transform in ("min", "max"):
+        extremes = np.full(n_groups, np.nan)
+        (np.fmin if transform == "min" else np.fmax).at(extremes, codes, data)
+        return extremes
+    counts = np.bincount(codes, minlength=n_groups)
+    if transform == "count":
+        return counts
+    sums = np.bincount(codes, weights=data, minlength=n_groups)
+    if transform == "sum":
+        return sums
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = sums / counts
+        if transform == "mean":
+            return means
+        # sample standard deviation (ddof=1), as in pandas
+        sq_devs = np.bincount(codes, weights=(data - means[codes]) ** 2,
+                              minlength=n_groups)
+        return np.sqrt(sq_devs / np.maximum(counts - 1, 0))
+
+
+def bincount_mode(codes, n_groups, data, n_values):
+    """
+    Return the most frequent of `n_values` discrete values in each of
+    `n_groups` groups given by `codes`; ties go to the lowest value, as in
+    scipy.stats.mode, and groups without defined values get nan.
+    """
+    defined = (codes >= 0) & ~np.isnan(data)
+    flat = codes[defined] * n_values + data[defined].astype(int)
+    counts = np.bincount(flat, minlength=n_groups * n_values)\
+        .reshape(n_groups, n_values)
+    modes = counts.argmax(axis=1).astype(float)
+    modes[counts.max(axis=1, initial=0) == 0] = np.nan
+    return modes
+
 
 class OWChoropleth(OWWidget):
     """
@@ -748,18 +822,21 @@ class OWChoropleth(OWWidget):
             if self.attr_lat and self.attr_lon else []
 
     @property
-    def effective_data(self):
-        eff_var = self.effective_variables
-        if eff_var and self.attr_lat.name == self.attr_lon.name:
-            eff_var = [self.attr_lat]
-        return self.data.transform(Domain(eff_var))
+    def effective_latlon(self):
+        return self.get_latlon(self.attr_lat, self.attr_lon)
+
+    def get_latlon(self, lat_attr, lon_attr):
+        latlon = np.empty((len(self.data), 2))
+        latlon[:, 0] = self.data.get_column(lat_attr)
+        latlon[:, 1] = self.data.get_column(lon_attr)
+        return latlon
 
     # Input
     @Inputs.data
     @check_sql_input
     def set_data(self, data):
         data_existed = self.data is not None
-        effective_data = self.effective_data if data_existed else None
+        effective_latlon = self.effective_latlon if data_existed else None
 
         self.closeContext()
         self.data = data
@@ -770,10 +847,13 @@ class OWChoropleth(OWWidget):
         self.openContext(self.data)
 
         if not (data_existed and self.data is not None and
-                array_equal(effective_data.X, self.effective_data.X)):
+                array_equal(effective_latlon, self.effective_latlon)):
             self.clear(cache=True)
             self.input_changed.emit(data)
             self.setup_plot()
+        # aggregated values may differ even when coordinates are the same
+        self.get_grouped.cache_clear()
+        self.get_binnings.cache_clear()
         self.update_agg()
         self.apply_selection()
         self.unconditional_commit()
@@ -863,11 +943,13 @@ class OWChoropleth(OWWidget):
 
             if self.selection:
                 # we get selection by region ids so we have to map it to points
-                for id, s in self.selection:
-                    if s == 0:
-                        continue
-                    id_indices = np.where(self.data_ids == id)[0]
-                    group_sel[id_indices] = s
+                codes, uniques = self.get_codes(self.attr_lat, self.attr_lon,
+                                                self.admin_level)
+                region_group = dict(self.selection)
+                # the last element is the group of points without a region
+                group_sel = np.array(
+                    [region_group.get(id_, 0) for id_ in uniques] + [0]
+                )[codes]
             else:
                 graph_sel = [0]
 
@@ -891,8 +973,9 @@ class OWChoropleth(OWWidget):
         if np.all(np.isnan(self.agg_data)):
             self.binning = []
         else:
-            binner = time_binnings if self.is_time() else decimal_binnings
-            self.binnings = binner(self.agg_data, min_bins=3, max_bins=15)
+            self.binnings = self.get_binnings(self.attr_lat, self.attr_lon,
+                                              self.admin_level, self.agg_attr,
+                                              self.agg_func)
 
         max_index = len(self.binnings) - 1
         self.controls.binning_index.setMaximum(max(1, max_index))
@@ -937,13 +1020,12 @@ class OWChoropleth(OWWidget):
             return [value for value, infreq in zip(self.agg_attr.values, infrequent)
                     if not infreq] + ["Other"]
         else:
+            # map frequent values to consecutive indices, others to "Other"
+            lookup = np.full(len(infrequent), MAX_COLORS - 1, dtype=float)
+            lookup[~infrequent] = np.arange(np.sum(~infrequent))
             result = self.agg_data.copy()
-            freq_vals = [i for i, f in enumerate(infrequent) if not f]
-            for i, infreq in enumerate(infrequent):
-                if infreq:
-                    result[self.agg_data == i] = MAX_COLORS - 1
-                else:
-                    result[self.agg_data == i] = freq_vals.index(i)
+            defined = ~np.isnan(result)
+            result[defined] = lookup[result[defined].astype(int)]
             return result
 
     def is_mode(self):
@@ -956,6 +1038,32 @@ class OWChoropleth(OWWidget):
                self.agg_attr.is_time and \
                self.agg_func not in COUNT_AGGS
 
+    @memoize_method(2)
+    def get_unique_latlon(self, lat_attr, lon_attr):
+        """
+        Get distinct coordinates, shared by all admin levels.
+        Returns:
+            ndarray of distinct (lat, lon) pairs,
+            ndarray of indices of pairs corresponding to points
+        """
+        latlon = self.get_latlon(lat_attr, lon_attr)
+        coords, inverse = np.unique(latlon, axis=0, return_inverse=True)
+        return coords, inverse.ravel()
+
+    @memoize_method(3)
+    def get_coord_regions(self, lat_attr, lon_attr, admin):
+        """
+        Map distinct coordinates to regions. Countries are found through
+        Admin1 regions, so they are derived from (cached) Admin1 regions.
+        Returns:
+            list of region property dicts corresponding to distinct coordinates
+        """
+        if admin == 0:
+            return admin1_to_country(
+                self.get_coord_regions(lat_attr, lon_attr, 1))
+        coords, _ = self.get_unique_latlon(lat_attr, lon_attr)
+        return latlon2region(coords, admin)
+
     @memoize_method(3)
     def get_regions(self, lat_attr, lon_attr, admin):
         """
@@ -965,39 +1073,80 @@ class OWChoropleth(OWWidget):
             dict of region ids matched to their additional info,
             dict of region ids matched to their polygon
         """
-        latlon = np.c_[self.data.get_column(lat_attr), self.data.get_column(lon_attr)]
-        region_info = latlon2region(latlon, admin)
-        ids = np.array([region.get('_id') for region in region_info])
-        region_info = {info.get('_id'): info for info in region_info}
-
-        self.data_ids = np.array(ids)
-        no_region = np.sum(self.data_ids == None)
+        _, inverse = self.get_unique_latlon(lat_attr, lon_attr)
+        regions = self.get_coord_regions(lat_attr, lon_attr, admin)
+        coord_ids = np.array([region.get('_id') for region in regions],
+                             dtype=object)
+        ids_ser = pd.Series(coord_ids)
+        first = np.flatnonzero(ids_ser.notna().values
+                               & ~ids_ser.duplicated().values)
+        unique_ids = list(coord_ids[first])
+        region_info = {coord_ids[i]: regions[i] for i in first}
+
+        ids = coord_ids[inverse]
+        self.data_ids = ids
+        no_region = np.sum(ids == None)
         if no_region:
             self.Warning.no_region(no_region)
 
-        unique_ids = list(set(ids) - {None})
         polygons = {_id: poly
                     for _id, poly in zip(unique_ids, get_shape(unique_ids))}
         return ids, region_info, polygons
 
+    @memoize_method(3)
+    def get_codes(self, lat_attr, lon_attr, admin):
+        """
+        Factorize region ids of points; kept apart from aggregation so that
+        changing the aggregation function does not regroup the points.
+        Returns:
+            ndarray of region indices (-1 for no region) corresponding
+            to points,
+            ndarray of unique region ids
+        """
+        ids, _, _ = self.get_regions(lat_attr, lon_attr, admin)
+        return pd.factorize(ids)
+
+    @memoize_method(5)
     def get_grouped(self, lat_attr, lon_attr, admin, attr, agg_func):
         """
         Get aggregation value for points grouped by regions.
         Returns:
             Series of aggregated values
         """
-        if attr is not None:
-            data = self.data.get_column(attr)
-        else:
-            data = np.ones(len(self.data))
-
-        ids, _, _ = self.get_regions(lat_attr, lon_attr, admin)
-        result = pd.Series(data, dtype=float)\
-            .groupby(ids)\
-            .agg(AGG_FUNCS[agg_func].transform)
+        # without an attribute, the only aggregation is counting instances
+        data = self.data.get_column(attr) if attr is not None else None
+
+        codes, uniques = self.get_codes(lat_attr, lon_attr, admin)
+        transform = AGG_FUNCS[agg_func].transform
+        if transform in BINCOUNT_AGGS:
+            return pd.Series(bincount_agg(codes, len(uniques), data, transform),
+                             index=uniques)
+        if agg_func == "Mode" and attr is not None and attr.is_discrete:
+            return pd.Series(bincount_mode(codes, len(uniques), data,
+                                           len(attr.values)),
+                             index=uniques)
+
+        grouped = codes >= 0
+        result = pd.Series(data[grouped], dtype=float, copy=False)\
+            .groupby(codes[grouped])\
+            .agg(transform)
+        result.index = uniques[result.index]
 
         return result
 
+    @memoize_method(5)
+    def get_binnings(self, lat_attr, lon_attr, admin, attr, agg_func):
+        """
+        Get binnings of aggregated values; computed once per aggregation.
+        Returns:
+            list of BinDefinition
+        """
+        agg_data = self.get_grouped(lat_attr, lon_attr, admin, attr,
+                                    agg_func).values
+        # called for the current attribute and aggregation function
+        binner = time_binnings if self.is_time() else decimal_binnings
+        return binner(agg_data, min_bins=3, max_bins=15)
+
     def get_agg_data(self) -> np.ndarray:
         result = self.get_grouped(self.attr_lat, self.attr_lon,
                                   self.admin_level, self.agg_attr,
@@ -1026,31 +1175,46 @@ class OWChoropleth(OWWidget):
             # if we don't have locations we can't compute regions
             return []
 
-        _, region_info, polygons = self.get_regions(self.attr_lat,
-                                                    self.attr_lon,
-                                                    self.admin_level)
-
-        regions = []
-        for _id in polygons:
-            if isinstance(polygons[_id], MultiPolygon):
-                # some regions consist of multiple polygons
-                polys = list(polygons[_id].geoms)
-            else:
-                polys = [polygons[_id]]
-
-            qpolys = [self.poly2qpoly(transform(self.deg2canvas, poly))
-                      for poly in polys]
-            regions.append(_ChoroplethRegion(id=_id, info=region_info[_id],
-                                             qpolys=qpolys))
-
-        self.choropleth_regions = sorted(regions, key=lambda cr: cr.id)
+        self.choropleth_regions = self.get_region_qpolys(self.attr_lat,
+                                                         self.attr_lon,
+                                                         self.admin_level)
         self.get_agg_data()
         return self.choropleth_regions
 
+    @memoize_method(3)
+    def get_region_qpolys(self, lat_attr, lon_attr, admin) \
+            -> List[_ChoroplethRegion]:
+        """
+        Convert polygons of regions to canvas coordinates. Regions are
+        cached, so they are not rebuilt when returning to an admin level.
+        """
+        _, region_info, polygons = self.get_regions(lat_attr, lon_attr, admin)
+
+        ids = list(polygons)
+        # convert all regions at once; multipolygons are split into parts
+        # and the parts' exterior rings into coordinate arrays
+        geoms = shapely.transform(np.array([polygons[_id] for _id in ids]),
+                                  self.coords2canvas)
+        parts, region_ix = shapely.get_parts(geoms, return_index=True)
+        coords, ring_ix = shapely.get_coordinates(
+            shapely.get_exterior_ring(parts), return_index=True)
+        rings = np.split(coords,
+                         np.searchsorted(ring_ix, np.arange(1, len(parts))))
+
+        region_qpolys = [[] for _ in ids]
+        for i, ring in zip(region_ix, rings):
+            region_qpolys[i].append(self.coords2qpoly(ring))
+        regions = [_ChoroplethRegion(id=_id, info=region_info[_id],
+                                     qpolys=qpolys)
+                   for _id, qpolys in zip(ids, region_qpolys)]
+
+        return sorted(regions, key=lambda cr: cr.id)
+
     @staticmethod
-    def poly2qpoly(poly: Polygon) -> QPolygonF:
-        return QPolygonF([QPointF(x, y)
-                          for x, y in poly.exterior.coords])
+    def coords2qpoly(coords: np.ndarray) -> QPolygonF:
+        qpoly = pg.functions.create_qpolygonf(len(coords))
+        pg.functions.ndarray_from_qpolygonf(qpoly)[:] = coords
+        return qpoly
 
     @staticmethod
     def deg2canvas(x, y):
@@ -1058,10 +1222,21 @@ class OWChoropleth(OWWidget):
         y = 1 - y
         return x, y
 
+    @classmethod
+    def coords2canvas(cls, coords: np.ndarray) -> np.ndarray:
+        """Vectorized `deg2canvas` for shapely.transform"""
+        return np.column_stack(cls.deg2canvas(coords[:, 0], coords[:, 1]))
+
     def clear(self, cache=False):
         self.choropleth_regions = []
         if cache:
+            self.get_unique_latlon.cache_clear()
+            self.get_coord_regions.cache_clear()
             self.get_regions.cache_clear()
+            self.get_region_qpolys.cache_clear()
+            self.get_codes.cache_clear()
+            self.get_grouped.cache_clear()
+            self.get_binnings.cache_clear()
 
     def send_report(self):
         if self.data is None:
@@ -92,6 +92,10 @@ class OWGeocoding(widget.OWWidget):
         self.data = None
         self.domainmodels = []
         self.unmatched = []
+        # key and result of the last geocoding, see _cached_coding
+        self._coding = None
+        # attribute and its values as names, see _get_data_values
+        self._names = None
 
         top = self.controlArea
 
@@ -230,12 +234,15 @@ class OWGeocoding(widget.OWWidget):
         if self.data is not None and len(self.data):
             data, metas = self.decode() if self.is_decoding else self.encode()
             if data is not None:
-                output = self.data.transform(
-                    Domain(self.data.domain.attributes,
-                           self.data.domain.class_vars,
-                           self.data.domain.metas + metas))
-                with output.unlocked(output.metas):
-                    output.metas[:, -data.shape[1]:] = data
+                domain = Domain(self.data.domain.attributes,
+                                self.data.domain.class_vars,
+                                self.data.domain.metas + metas)
+                # Only metas change, so X, Y and W are shared with the input
+                output = self.data.from_numpy(
+                    domain, self.data.X, self.data.Y,
+                    np.hstack((self.data.metas, data)),
+                    self.data.W, self.data.attributes, self.data.ids)
+                output.name = self.data.name
 
         self.Outputs.coded_data.send(output)
 
@@ -245,12 +252,15 @@ class OWGeocoding(widget.OWWidget):
                 self.lat_attr not in self.data.domain or
                 self.lon_attr not in self.data.domain):
             return None
-        latlon = np.c_[self.data.get_column(self.lat_attr),
-                       self.data.get_column(self.lon_attr)]
+        latlon = np.empty((len(self.data), 2))
+        latlon[:, 0] = self.data.get_column(self.lat_attr)
+        latlon[:, 1] = self.data.get_column(self.lon_attr)
         assert isinstance(self.admin, int)
         with self.progressBar(2) as progress:
             progress.advance()
-            regions = pd.DataFrame(latlon2region(latlon, self.admin))
+            regions = self._cached_coding(
+                (self.lat_attr, self.lon_attr, self.admin),
+                lambda: latlon2region(latlon, self.admin))
         return self._to_addendum(regions, ['name'])
 
     def encode(self):
@@ -261,11 +271,17 @@ class OWGeocoding(widget.OWWidget):
         log.debug('Geocoding %d regions into coordinates', len(values))
         with self.progressBar(4) as progress:
             progress.advance()
-            mappings = self.ID_TYPE[self.str_type](values)
+            replacements = frozenset((k, v)
+                                     for k, v in self.replacementsModel.tolist()
+                                     if v)
+            mappings = self._cached_coding(
+                (self.str_attr, self.str_type, replacements),
+                lambda: self.ID_TYPE[self.str_type](values))
 
             progress.advance()
-            invalid_idx = [i for i, value in enumerate(mappings) if not value]
-            self.unmatched = values[invalid_idx].drop_duplicates().dropna().sort_values()
+            matched = np.fromiter(map(bool, mappings), dtype=bool,
+                                  count=len(mappings))
+            self.unmatched = np.unique(values[~matched].dropna().values)
             self.info_str = '{} / {}'.format(len(self.unmatched),
                                              values.nunique())
 
@@ -283,46 +299,80 @@ class OWGeocoding(widget.OWWidget):
             self.setMainAreaVisibility(bool(self.replacements))
 
             progress.advance()
-            latlon = pd.DataFrame(mappings)
-        return self._to_addendum(latlon, ['latitude', 'longitude'])
+        return self._to_addendum(mappings, ['latitude', 'longitude'])
+
+    def _cached_coding(self, key, compute):
+        """
+        Return `compute()`, or the result of the previous call if `key` is
+        the same, so that changing unrelated settings does not recompute it.
+        """
+        key = (self.is_decoding, ) + key
+        if self._coding is None or self._coding[0] != key:
+            self._coding = (key, compute())
+        return self._coding[1]
 
     def _get_data_values(self):
         if self.data is None:
             return None
 
-        values = self.data.get_column(self.str_attr)
-        # no comment
-        if self.str_attr.is_discrete:
-            values = np.array(self.str_attr.values)[values.astype(np.int16)].astype(str)
-        values = pd.Series(values)
+        # names are computed once per attribute; replacements may change
+        if self._names is None or self._names[0] != self.str_attr:
+            self._names = (self.str_attr, self._get_region_names())
+        values = self._names[1]
 
         # Apply replacements from the replacements table
-        if len(self.replacementsModel):
-            values = values.replace({k: v
-                                     for k, v in self.replacementsModel.tolist()
-                                     if v})
+        replacements = {k: v for k, v in self.replacementsModel.tolist() if v}
+        if replacements:
+            # much faster than Series.replace with a dict
+            values = values.map(replacements).fillna(values)
         return values
 
-    def _to_addendum(self, df, keep):
-        if not df.shape[1]:
+    def _get_region_names(self):
+        values = self.data.get_column(self.str_attr)
+        if self.str_attr.is_discrete:
+            # look up value names in one gather; missing values stay missing
+            names = np.array(self.str_attr.values + (np.nan, ), dtype=object)
+            values = names.take(np.where(np.isnan(values),
+                                         len(self.str_attr.values),
+                                         values).astype(np.intp))
+        return pd.Series(values)
+
+    def _to_addendum(self, records, keep):
+        # Mappers return references to a few shared property dicts, so the
+        # table is built from distinct dicts only and then expanded
+        distinct = {id(rec): rec for rec in records}
+        index = {key: i for i, key in enumerate(distinct)}
+        codes = np.fromiter((index[id(rec)] for rec in records),
+                            dtype=np.intp, count=len(records))
+        distinct = list(distinct.values())
+
+        columns = list(dict.fromkeys(col for rec in distinct for col in rec))
+        if not columns:
             return None, None
 
-        df.drop(['_id', 'adm0_a3'], axis=1, inplace=True)
-        addendum = df if self.append_features else df[keep]
+        if self.append_features:
+            addendum = [col for col in columns
+                        if col not in ('_id', 'adm0_a3')]
+        else:
+            addendum = keep
+        values = np.array([[rec.get(col, np.nan) for col in addendum]
+                           for rec in distinct], dtype=object)
 
         metas = []
-        for col in addendum:
-            unique_name = get_unique_names(self.data.domain, col)
+        unique_names = get_unique_names(self.data.domain, list(addendum),
+                                        equal_numbers=False)
+        for col, unique_name in zip(addendum, unique_names):
             if col in ('latitude', 'longitude'):
                 metas.append(ContinuousVariable(unique_name))
             else:
                 metas.append(StringVariable(unique_name))
 
-        return addendum.values, tuple(metas)
+        return values[codes], tuple(metas)
 
     @Inputs.data
     def set_data(self, data):
         self.data = data
+        self._coding = self._names = None
         self.closeContext()
 
         if data is None or not len(data):
@@ -1,14 +1,19 @@
 import unittest
 from unittest.mock import patch
 import numpy as np
+import pandas as pd
 
-from AnyQt.QtCore import QRectF, QPointF
+from AnyQt.QtCore import Qt, QRectF, QPointF
+from AnyQt.QtGui import QBrush, QColor, QImage, QPainter, QPolygonF
+from AnyQt.QtWidgets import QGraphicsScene
 
 from Orange.data import Table, Domain
 from Orange.widgets.tests.base import WidgetTest, WidgetOutputsTestMixin
 from Orange.widgets.visualize.owscatterplotgraph import SymbolItemSample
 from orangecontrib.geo.widgets.owchoropleth import OWChoropleth, \
-    BinningPaletteItemSample, DEFAULT_AGG_FUNC
+    OWChoroplethPlotGraph, ChoroplethItem, _ChoroplethRegion, \
+    BinningPaletteItemSample, DEFAULT_AGG_FUNC, BINCOUNT_AGGS, bincount_agg, \
+    bincount_mode, AGG_FUNCS
 
 
 class TestOWChoropleth(WidgetTest, WidgetOutputsTestMixin):
@@ -161,5 +166,57 @@ class TestOWChoroplethPlotGraph(WidgetTest):
         self.assertEqual(self.graph.selected_ids(), [])
 
 
+class TestChoroplethItem(WidgetTest):
+    def test_selection_outline_not_clipped(self):
+        square = QPolygonF([QPointF(0, 0), QPointF(1, 0),
+                            QPointF(1, 1), QPointF(0, 1)])
+        region = _ChoroplethRegion(id="a", info={"name": "a"}, qpolys=[square])
+        pen = OWChoroplethPlotGraph._make_pen(QColor(255, 0, 0), 3)
+        item = ChoroplethItem(region, pen, QBrush(QColor(0, 0, 255)))
+        scene = QGraphicsScene()
+        scene.addItem(item)
+
+        # the square is drawn at (10, 10) - (110, 110)
+        image = QImage(120, 120, QImage.Format_ARGB32)
+        image.fill(Qt.white)
+        painter = QPainter(image)
+        scene.render(painter, QRectF(0, 0, 120, 120),
+                     QRectF(-0.1, -0.1, 1.2, 1.2))
+        painter.end()
+
+        def is_outline(x, y):
+            color = QColor(image.pixel(x, y))
+            return color.red() > 200 and color.blue() < 50
+
+        # the outer half of the outline lies outside the bounding rect
+        self.assertTrue(any(is_outline(x, 60) for x in range(111, 115)))
+        self.assertTrue(any(is_outline(60, y) for y in range(111, 115)))
+        scene.removeItem(item)
+
+
+class TestBincountAgg(unittest.TestCase):
+    def test_matches_pandas(self):
+        ids = np.array(["a", None, "b", "a", "c", "b", "a", "d", "d"],
+                       dtype=object)
+        data = np.array([1, 2, np.nan, 4, np.nan, 6, 7, 3, 5], dtype=float)
+        codes, uniques = pd.factorize(ids)
+        for transform in BINCOUNT_AGGS:
+            expected = pd.Series(data).groupby(ids).agg(transform)
+            np.testing.assert_allclose(
+                bincount_agg(codes, len(uniques), data, transform),
+                expected[uniques].values)
+        np.testing.assert_equal(bincount_agg(codes, len(uniques), None, "size"),
+                                [3, 2, 1, 2])
+
+    def test_mode_matches_scipy(self):
+        ids = np.array(["a", "b", "a", None, "c", "a", "b", "c"], dtype=object)
+        data = np.array([2, 1, 0, 1, np.nan, 2, 0, np.nan])
+        codes, uniques = pd.factorize(ids)
+        expected = pd.Series(data).groupby(ids) \
+            .agg(AGG_FUNCS["Mode"].transform)
+        np.testing.assert_equal(bincount_mode(codes, len(uniques), data, 3),
+                                expected[uniques].values)
+
+
 if __name__ == "__main__":
     unittest.main()
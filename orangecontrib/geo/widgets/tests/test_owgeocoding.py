@@ -1,5 +1,6 @@
 # pylint: disable=protected-access
 import unittest
+from unittest.mock import Mock, patch
 
 from Orange.data import Table, Domain, DiscreteVariable, StringVariable
 from Orange.widgets.tests.base import WidgetTest
@@ -126,6 +127,41 @@ class TestOWGeocoding(WidgetTest):
         self.assertEqual(self.widget.str_type, "Country name")
         self.assertEqual(self.widget.str_type_combo.currentText(), "Country name")
 
+    def test_append_features_reuses_coding(self):
+        hdi_data = Table("HDI-small")
+        self.send_signal(self.widget.Inputs.data, hdi_data)
+        n_metas = len(self.get_output(self.widget.Outputs.coded_data).domain.metas)
+
+        str_type = self.widget.str_type
+        with patch.dict(self.widget.ID_TYPE, {str_type: Mock()}):
+            self.widget.controls.append_features.click()
+            self.widget.ID_TYPE[str_type].assert_not_called()
+        self.assertGreater(
+            len(self.get_output(self.widget.Outputs.coded_data).domain.metas),
+            n_metas)
+
+    def test_discrete_values(self):
+        var = DiscreteVariable("c", values=("Slovenia", "Germany"))
+        data = Table.from_list(Domain([var]), [[1], [None], [0]])
+        self.send_signal(self.widget.Inputs.data, data)
+        self.widget.str_attr = var
+        values = self.widget._get_data_values()
+        self.assertEqual(values[0], "Germany")
+        self.assertTrue(values.isna()[1])
+        self.assertEqual(values[2], "Slovenia")
+
+    def test_replacements(self):
+        var = StringVariable("s")
+        data = Table.from_list(Domain([], metas=[var]),
+                               [["Slovenija"], [""], ["Germany"], ["Slovenija"]])
+        self.send_signal(self.widget.Inputs.data, data)
+        self.widget.replacementsModel.wrap([["Germany", ""],
+                                            ["Slovenija", "Slovenia"]])
+        values = self.widget._get_data_values()
+        self.assertEqual(values[0], "Slovenia")
+        self.assertEqual(values[2], "Germany")
+        self.assertEqual(values[3], "Slovenia")
+
     def test_minimum_size(self):
         pass
 
@@ -63,10 +63,9 @@ if __name__ == '__main__':
         include_package_data=True,
         install_requires=[
             'Orange3>=3.37.0',
-            'scikit-learn',
             'pandas',
             'scipy>=0.17',
-            'shapely',
+            'shapely>=2.0',
             'pyproj',
             'simplejson',
             'Pillow'